@@ -2,11 +2,13 @@ import logging
 import json
 import os
 import asyncio
+import secrets
 from datetime import datetime
 from typing import Annotated, Literal
 from dataclasses import dataclass, field
 
 from dotenv import load_dotenv
+from livekit import rtc
 from pydantic import Field
 from livekit.agents import (
     Agent,
@@ -23,16 +25,32 @@ from livekit.agents import (
     function_tool,
 )
 
-from livekit.plugins import murf, silero, google, deepgram, noise_cancellation
+from livekit.plugins import silero, google, deepgram, noise_cancellation
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
 logger = logging.getLogger("agent")
-load_dotenv(".env.local")
+
+# cli.run_app reimports this module in every prewarm subprocess; the flag
+# rides along in the environment so children skip re-walking the
+# filesystem for .env.local
+if not os.environ.get("_AGENT_ENV_LOADED"):
+    load_dotenv(".env.local")
+    os.environ["_AGENT_ENV_LOADED"] = "1"
 
 # ======================================================
 # 🛒 ORDER MANAGEMENT SYSTEM
 # ======================================================
-@dataclass
+# 📋 Required order fields with their friendly labels, in prompt order -
+# drives both completeness checks instead of parallel if-chains
+REQUIRED_FIELDS = (
+    ("drinkType", "☕ drink type"),
+    ("size", "📏 size"),
+    ("milk", "🥛 milk"),
+    ("extras", "🎯 extras"),
+    ("name", "👤 name"),
+)
+
+@dataclass(slots=True)
 class OrderState:
     """☕ Coffee shop order state with validation"""
     drinkType: str | None = None
@@ -43,13 +61,11 @@ class OrderState:
     
     def is_complete(self) -> bool:
         """✅ Check if all required fields are filled"""
-        return all([
-            self.drinkType is not None,
-            self.size is not None,
-            self.milk is not None,
-            self.extras is not None,
-            self.name is not None
-        ])
+        return all(getattr(self, attr) is not None for attr, _ in REQUIRED_FIELDS)
+
+    def missing_fields(self) -> list[str]:
+        """🔍 Friendly labels of required fields still unset"""
+        return [label for attr, label in REQUIRED_FIELDS if getattr(self, attr) is None]
     
     def to_dict(self) -> dict:
         """📦 Convert to dictionary for JSON serialization"""
@@ -69,7 +85,7 @@ class OrderState:
         extras_text = f" with {', '.join(self.extras)}" if self.extras else ""
         return f"☕ {self.size.upper()} {self.drinkType.title()} with {self.milk.title()} milk{extras_text} for {self.name}"
 
-@dataclass
+@dataclass(slots=True)
 class Userdata:
     """👤 User session data"""
     order: OrderState
@@ -152,19 +168,23 @@ async def set_name(
     print(f"📊 Order Progress: {ctx.userdata.order.get_summary()}")
     return f"👤 Wonderful, {ctx.userdata.order.name}! Almost ready to complete your order!"
 
+# 📋 Preformatted console banners - one print call instead of a line-by-line
+# append loop, with only the per-order fields filled in at runtime
+COMPLETED_BANNER = (
+    "\n" + "⭐" * 60 + "\n"
+    "🎉 ORDER COMPLETED SUCCESSFULLY!\n"
+    "👤 Customer: {name}\n"
+    "☕ Order: {size} {drink} with {milk} milk{extras}\n"
+    + "⭐" * 60 + "\n"
+)
+
 @function_tool
 async def complete_order(ctx: RunContext[Userdata]) -> str:
     """🎉 Finalize and save order to JSON. ONLY call when ALL fields are filled."""
     order = ctx.userdata.order
     
     if not order.is_complete():
-        missing = []
-        if not order.drinkType: missing.append("☕ drink type")
-        if not order.size: missing.append("📏 size")
-        if not order.milk: missing.append("🥛 milk")
-        if order.extras is None: missing.append("🎯 extras")
-        if not order.name: missing.append("👤 name")
-        
+        missing = order.missing_fields()
         print(f"❌ CANNOT COMPLETE - Missing: {', '.join(missing)}")
         return f"🔄 Almost there! Just need: {', '.join(missing)}"
     
@@ -174,17 +194,20 @@ async def complete_order(ctx: RunContext[Userdata]) -> str:
         save_order_to_json(order)
         extras_text = f" with {', '.join(order.extras)}" if order.extras else ""
         
-        print("\n" + "⭐" * 60)
-        print("🎉 ORDER COMPLETED SUCCESSFULLY!")
-        print(f"👤 Customer: {order.name}")
-        print(f"☕ Order: {order.size} {order.drinkType} with {order.milk} milk{extras_text}")
-        print("⭐" * 60 + "\n")
+        print(COMPLETED_BANNER.format(
+            name=order.name,
+            size=order.size,
+            drink=order.drinkType,
+            milk=order.milk,
+            extras=extras_text,
+        ))
         
-        return f"""🎉 PERFECT! Your {order.size} {order.drinkType} with {order.milk} milk{extras_text} is confirmed, {order.name}! 
-
-⏰ We're preparing your drink now - it'll be ready in 3-5 minutes!
-
-📺 **Thanks for using our AI Barista!** """
+        # Keep the tool result short - it feeds back through the LLM, so a
+        # long payload just delays the spoken confirmation
+        return (
+            f"🎉 Order confirmed, {order.name}! Your {order.size} {order.drinkType} "
+            f"with {order.milk} milk{extras_text} will be ready in 3-5 minutes."
+        )
         
     except Exception as e:
         print(f"❌ ORDER SAVE FAILED: {e}")
@@ -200,45 +223,37 @@ async def get_order_status(ctx: RunContext[Userdata]) -> str:
     progress = order.get_summary()
     return f"📊 Order in progress: {progress}"
 
+# 📜 Built once at import so each room connect only threads references into
+# the Agent constructor. The Agent instance itself must stay per-session:
+# the livekit base class stashes the chat context on self, so a shared
+# singleton would leak one customer's conversation into the next.
+BARISTA_INSTRUCTIONS = """\
+🏪 You are a warm, professional barista at "coffee wala".
+Greet the customer, then collect one answer at a time in this order:
+drink type, size, milk, extras, customer name.
+Record every answer with the matching function tool - the tool parameters
+define the valid menu options, so offer those when the customer asks.
+Confirm each choice briefly, and once every field is set call
+complete_order and celebrate the finished order.
+"""
+
+# 🛠️ Tool registry shared by every BaristaAgent - a tuple so it can't be
+# mutated
+BARISTA_TOOLS = (
+    set_drink_type,
+    set_size,
+    set_milk,
+    set_extras,
+    set_name,
+    complete_order,
+    get_order_status,
+)
+
 class BaristaAgent(Agent):
     def __init__(self):
         super().__init__(
-            instructions="""
-            🏪 You are a FRIENDLY and PROFESSIONAL barista at "coffee wala".
-            
-            🎯 MISSION: Take coffee orders by systematically collecting:
-            ☕ Drink Type: latte, cappuccino, americano, espresso, mocha, coffee, cold brew, matcha
-            📏 Size: small, medium, large, extra large
-            🥛 Milk: whole, skim, almond, oat, soy, coconut, none
-            🎯 Extras: sugar, whipped cream, caramel, extra shot, vanilla, cinnamon, honey, or none
-            👤 Customer Name: for the order
-            
-            📝 PROCESS:
-            1. Greet warmly and ask for drink type
-            2. Ask for size preference  
-            3. Ask for milk choice
-            4. Ask about extras
-            5. Get customer name
-            6. Confirm and complete order
-            
-            🎨 STYLE:
-            - Be warm, enthusiastic, and professional
-            - Use emojis to make it friendly
-            - Ask one question at a time
-            - Confirm choices as you go
-            - Celebrate when order is complete
-            
-            🛠️ Use the function tools to record each piece of information.
-            """,
-            tools=[
-                set_drink_type,
-                set_size,
-                set_milk,
-                set_extras,
-                set_name,
-                complete_order,
-                get_order_status,
-            ],
+            instructions=BARISTA_INSTRUCTIONS,
+            tools=list(BARISTA_TOOLS),
         )
 
 def create_empty_order():
@@ -256,28 +271,38 @@ def get_orders_folder():
     os.makedirs(folder, exist_ok=True)
     return folder
 
+SAVED_BANNER = (
+    "\n" + "✅" * 30 + "\n"
+    "🎉 ORDER SAVED SUCCESSFULLY!\n"
+    "📁 Location: {path}\n"
+    "👤 Customer: {name}\n"
+    "☕ Order: {summary}\n"
+    + "✅" * 30 + "\n"
+)
+
 def save_order_to_json(order: OrderState) -> str:
     """💾 Save order to JSON file with enhanced logging"""
     print(f"\n🔄 ATTEMPTING TO SAVE ORDER...")
     folder = get_orders_folder()
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"order_{timestamp}.json"
+    now = datetime.now()
+    timestamp = now.strftime("%Y%m%d_%H%M%S")
+    order_id = secrets.token_hex(4)
+    filename = f"order_{timestamp}_{order_id}.json"
     path = os.path.join(folder, filename)
 
     try:
         order_data = order.to_dict()
-        order_data["timestamp"] = datetime.now().isoformat()
-        order_data["session_id"] = f"session_{timestamp}"
+        order_data["timestamp"] = now.isoformat()
+        order_data["session_id"] = f"session_{order_id}"
         
         with open(path, "w", encoding='utf-8') as f:
             json.dump(order_data, f, indent=4, ensure_ascii=False)
         
-        print("\n" + "✅" * 30)
-        print("🎉 ORDER SAVED SUCCESSFULLY!")
-        print(f"📁 Location: {path}")
-        print(f"👤 Customer: {order.name}")
-        print(f"☕ Order: {order.get_summary()}")
-        print("✅" * 30 + "\n")
+        print(SAVED_BANNER.format(
+            path=path,
+            name=order.name,
+            summary=order.get_summary(),
+        ))
         
         return path
         
@@ -312,12 +337,44 @@ def test_order_saving():
 # ======================================================
 # 🔧 SYSTEM INITIALIZATION & PREWARMING
 # ======================================================
+async def _warm_vad(vad: silero.VAD) -> None:
+    """🔥 Push 100ms of synthetic silence through the VAD stream"""
+    # 100ms at 16kHz comfortably covers the silero plugin's 512-sample
+    # inference window; anything shorter never reaches the ONNX model
+    sample_rate = 16000
+    samples = int(sample_rate * 0.1)
+    frame = rtc.AudioFrame(
+        data=b"\x00\x00" * samples,
+        sample_rate=sample_rate,
+        num_channels=1,
+        samples_per_channel=samples,
+    )
+    stream = vad.stream()
+    try:
+        stream.push_frame(frame)
+        stream.end_input()
+        # Drain the event stream so the inference task actually consumes the
+        # audio - closing right after push_frame would cancel it before the
+        # first ONNX call
+        async for _ in stream:
+            pass
+    finally:
+        await stream.aclose()
+
 def prewarm(proc: JobProcess):
     """🔥 Preload VAD model for better performance"""
     print("🔥 Prewarming VAD model...")
     proc.userdata["vad"] = silero.VAD.load()
     print("✅ VAD model loaded successfully!")
 
+    # Run a dummy inference now so the first customer utterance doesn't pay
+    # the ONNX graph-allocation cost on its opening audio chunk.
+    try:
+        asyncio.run(_warm_vad(proc.userdata["vad"]))
+        print("🔥 VAD warmup inference complete!")
+    except Exception as e:
+        print(f"⚠️ VAD warmup inference skipped: {e}")
+
 # ======================================================
 # 🎬 AGENT SESSION MANAGEMENT
 # ======================================================
@@ -331,22 +388,35 @@ async def entrypoint(ctx: JobContext):
     # Create user session data with empty order
     userdata = Userdata(order=create_empty_order())
     
-    session_id = datetime.now().strftime("%Y%m%d_%H%M%S")
+    session_id = secrets.token_hex(4)
     print(f"\n🆕 NEW CUSTOMER SESSION: {session_id}")
     print(f"📝 Initial order state: {userdata.order.get_summary()}\n")
 
     # Create session with userdata
     session = AgentSession(
-        stt=deepgram.STT(model="nova-3"),
-        llm=google.LLM(model="gemini-2.5-flash"),
-        tts=murf.TTS(
-            voice="en-US-matthew",
-            style="Conversation",
-            text_pacing=True,
+        # 🎤 These match the plugin's current defaults; pinned explicitly so
+        # a plugin upgrade can't silently change when short replies like
+        # "latte" or "yes" finalize
+        stt=deepgram.STT(
+            model="nova-3",
+            interim_results=True,
+            endpointing_ms=25,
         ),
+        llm=google.LLM(model="gemini-2.5-flash"),
+        # 🔊 WebSocket streaming TTS - audio starts playing on the first
+        # synthesized chunk instead of waiting for the full utterance
+        tts=deepgram.TTS(model="aura-2-orion-en"),
         turn_detection=MultilingualModel(),
         vad=ctx.proc.userdata["vad"],
         userdata=userdata,  # Pass userdata to session
+        # ⚡ Latency tuning: start LLM inference while the turn detector is
+        # still confirming end-of-turn, and shrink the endpointing window.
+        # Preemptive generation may discard a started LLM call if the
+        # customer keeps talking - cheap with gemini-2.5-flash.
+        preemptive_generation=True,
+        min_endpointing_delay=0.05,
+        max_endpointing_delay=3.0,
+        min_interruption_duration=0.3,
     )
 
     # Metrics collection